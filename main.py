@@ -1,15 +1,21 @@
 import os
 import time
 import json
+import hashlib
 import logging
-import ipaddress
-from collections import defaultdict
+import socket
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from git import Repo
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import schedule
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 
 CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
+DEFAULT_WHOIS_MAX_WORKERS = 32
+OCTET_STRINGS = tuple(str(octet) for octet in range(256))
 
 
 def load_config() -> Dict[str, str]:
@@ -68,6 +74,7 @@ def initialize_repo(repo_path: str) -> Repo:
 def check_for_remote_changes(repo: Repo) -> bool:
     """
     Checks if there are any changes in the remote Git repository compared to the local repository.
+    Only the remote head is queried via ls-remote, no objects are fetched.
 
     Args:
         repo (Repo): The local Git repository object.
@@ -76,11 +83,10 @@ def check_for_remote_changes(repo: Repo) -> bool:
         bool: True if changes are detected in the remote repository, False otherwise.
     """
     try:
-        origin = repo.remotes.origin
-        origin.fetch()
-        local_commit = repo.commit("refs/heads/main")
-        remote_commit = repo.commit("refs/remotes/origin/main")
-        return local_commit != remote_commit
+        remote_head = repo.git.ls_remote("origin", "refs/heads/main")
+        remote_sha = remote_head.split()[0]
+        local_sha = repo.commit("refs/heads/main").hexsha
+        return local_sha != remote_sha
     except Exception as e:
         logging.error(f"Error checking for remote changes: {e}")
         return False
@@ -119,26 +125,62 @@ def commit_and_push_changes(repo: Repo) -> None:
         logging.error(f"Error committing and pushing changes: {e}")
 
 
-def load_input_file_entries(input_file_path: str) -> List[str]:
+def read_input_file(input_file_path: str) -> bytes:
     """
-    Loads entries from an input file.
+    Reads the raw content of an input file.
 
     Args:
         input_file_path (str): Path to the input file.
 
     Returns:
-        List[str]: List of entries (IP addresses) from the file.
+        bytes: Content of the input file.
     """
     try:
-        with open(input_file_path, "r") as file:
-            lines = [line.strip() for line in file]
-            logging.info(f"Loaded {len(lines)} lines from {input_file_path}")
-            return lines
+        with open(input_file_path, "rb", buffering=1 << 20) as file:
+            return file.read()
     except FileNotFoundError:
         logging.error(f"File {input_file_path} not found.")
         exit(1)
 
 
+def load_input_file_entries(data: bytes, input_file_path: str) -> List[str]:
+    """
+    Loads entries from the content of an input file.
+
+    Args:
+        data (bytes): Content of the input file.
+        input_file_path (str): Path to the input file.
+
+    Returns:
+        List[str]: List of entries (IP addresses) from the file.
+    """
+    lines = [line.strip() for line in data.decode("utf-8-sig", "replace").splitlines()]
+    logging.info(f"Loaded {len(lines)} lines from {input_file_path}")
+    return lines
+
+
+def hash_input_file(data: bytes, config: Dict[str, str]) -> str:
+    """
+    Computes a SHA-256 fingerprint of an input file and the configuration settings
+    that affect its output (grouping threshold and FortiGate limits).
+
+    Args:
+        data (bytes): Content of the input file.
+        config (Dict[str, str]): Configuration settings for processing.
+
+    Returns:
+        str: Hex digest of the fingerprint.
+    """
+    output_settings = {
+        key: value
+        for key, value in config.items()
+        if key == "threshold_group_ips_into_subnets" or key.startswith("fg_")
+    }
+    digest = hashlib.sha256(json.dumps(output_settings, sort_keys=True).encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
 def load_existing_output_file_entries(output_file_path: str) -> Dict[str, str]:
     """
     Loads existing entries from an output file.
@@ -151,100 +193,255 @@ def load_existing_output_file_entries(output_file_path: str) -> Dict[str, str]:
     """
     entries = {}
     if os.path.exists(output_file_path):
-        with open(output_file_path, "r", encoding="utf-8") as file:
-            for line in file:
+        with open(output_file_path, "r", encoding="utf-8", buffering=1 << 20) as file:
+            for line in file.read().splitlines():
                 if line.strip() and not line.startswith("#"):
-                    parts = line.split(" ", 1)
-                    entry = parts[0].strip()
-                    comment = parts[1].strip("# ").strip() if len(parts) > 1 else ""
-                    entries[entry] = comment
+                    entry, _, comment = line.partition(" ")
+                    entries[entry.strip()] = comment.strip("# \t")
         logging.info(f"Loaded {len(entries)} entries from {output_file_path}")
     else:
         logging.info(f"No existing output file found at {output_file_path}")
     return entries
 
 
-def remove_duplicates(addresses: List[str]) -> List[str]:
+def load_cache_file(file_name: str) -> Dict[str, str]:
+    """
+    Loads a JSON cache file from the cache directory.
+
+    Args:
+        file_name (str): Name of the cache file.
+
+    Returns:
+        Dict[str, str]: Cached data, or an empty dictionary if the file is missing or unreadable.
+    """
+    cache_path = os.path.join(CURRENT_DIR, "cache", file_name)
+    if not os.path.exists(cache_path):
+        logging.info(f"No cache file found at {cache_path}")
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+        logging.info(f"Loaded {len(cache)} cached entries from {cache_path}")
+        return cache
+    except Exception as e:
+        logging.error(f"Error loading cache file: {e}")
+        return {}
+
+
+def save_cache_file(file_name: str, cache: Dict[str, str]) -> None:
+    """
+    Atomically writes a JSON cache file to the cache directory.
+
+    Args:
+        file_name (str): Name of the cache file.
+        cache (Dict[str, str]): Data to be cached.
+    """
+    cache_path = os.path.join(CURRENT_DIR, "cache", file_name)
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logging.error(f"Error writing cache file: {e}")
+
+
+def remove_duplicates(addresses: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
     """
     Removes duplicate IP addresses from the list.
+    Addresses are compared by their parsed value, so equivalent spellings such as
+    1.2.3.4 and 1.2.3.4/32 are duplicates.
 
     Args:
-        addresses (List[str]): List of IP addresses.
+        addresses (List[Tuple[int, int]]): List of IP addresses as network address and prefix length.
 
     Returns:
-        List[str]: List of unique IP addresses.
+        List[Tuple[int, int]]: List of unique IP addresses.
     """
-    unique_addresses = sorted(set(addresses))
+    unique_addresses = list(set(addresses))
     logging.info(
         f"Removed duplicates. {len(addresses)} -> {len(unique_addresses)} unique addresses."
     )
     return unique_addresses
 
 
-def validate_ip_addresses(addresses: List[str]) -> List[str]:
+def parse_ipv4(entry: str) -> Optional[Tuple[int, int]]:
+    """
+    Parses an IPv4 address or subnet in CIDR or netmask notation into integers.
+    Host bits of subnets are cleared, plain addresses are treated as /32 subnets.
+
+    Args:
+        entry (str): IPv4 address or subnet.
+
+    Returns:
+        Optional[Tuple[int, int]]: Network address and prefix length, or None if the entry is invalid.
+    """
+    address, separator, prefix = entry.partition("/")
+    try:
+        network_address = int.from_bytes(
+            socket.inet_pton(socket.AF_INET, address), "big"
+        )
+    except OSError:
+        return None
+    if not separator:
+        return network_address, 32
+    prefixlen = parse_ipv4_prefix(prefix)
+    if prefixlen is None:
+        return None
+    return network_address & (0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF, prefixlen
+
+
+def parse_ipv4_prefix(prefix: str) -> Optional[int]:
+    """
+    Parses the prefix part of an IPv4 subnet, given either as prefix length
+    or as dotted netmask or hostmask (e.g. 24, 255.255.255.0 or 0.0.0.255).
+
+    Args:
+        prefix (str): Prefix length, netmask or hostmask.
+
+    Returns:
+        Optional[int]: Prefix length, or None if the prefix is invalid.
+    """
+    if prefix.isascii() and prefix.isdigit():
+        return int(prefix) if int(prefix) <= 32 else None
+    try:
+        mask = int.from_bytes(socket.inet_pton(socket.AF_INET, prefix), "big")
+    except OSError:
+        return None
+    host_bits = ~mask & 0xFFFFFFFF
+    if host_bits & (host_bits + 1) == 0:  # Netmask, e.g. 255.255.255.0
+        return 32 - host_bits.bit_length()
+    if mask & (mask + 1) == 0:  # Hostmask, e.g. 0.0.0.255
+        return 32 - mask.bit_length()
+    return None
+
+
+def format_ipv4(network_address: int, prefixlen: int) -> str:
+    """
+    Formats integer network address and prefix length in CIDR notation.
+    Octets are looked up from precomputed strings instead of being converted one by one.
+
+    Args:
+        network_address (int): Network address as integer.
+        prefixlen (int): Prefix length.
+
+    Returns:
+        str: Subnet in CIDR notation.
+    """
+    return (
+        f"{OCTET_STRINGS[network_address >> 24]}."
+        f"{OCTET_STRINGS[network_address >> 16 & 0xFF]}."
+        f"{OCTET_STRINGS[network_address >> 8 & 0xFF]}."
+        f"{OCTET_STRINGS[network_address & 0xFF]}/{prefixlen}"
+    )
+
+
+def validate_ip_addresses(addresses: List[str]) -> List[Tuple[int, int]]:
     """
     Validates the given list of IP addresses.
+    Identical lines are only validated (and reported) once.
 
     Args:
         addresses (List[str]): List of IP addresses.
 
     Returns:
-        List[str]: List of valid IP addresses.
+        List[Tuple[int, int]]: List of valid IP addresses as network address and prefix length.
     """
+    unique_lines = dict.fromkeys(addresses)
     valid_ips = []
-    for ip in addresses:
-        try:
-            ipaddress.ip_address(ip.split("/")[0])
-            valid_ips.append(ip)
-        except ValueError:
+    for ip in unique_lines:
+        network = parse_ipv4(ip)
+        if network is None:
             logging.warning(f"{ip} is not a valid IP address!")
+        else:
+            valid_ips.append(network)
     logging.info(
-        f"Validated addresses. {len(valid_ips)} valid, {len(addresses) - len(valid_ips)} invalid."
+        f"Validated {len(unique_lines)} distinct addresses. {len(valid_ips)} valid, {len(unique_lines) - len(valid_ips)} invalid."
     )
     return valid_ips
 
 
-def group_ips_into_subnets(addresses: List[str], threshold: int) -> List[str]:
+def group_ips_into_subnets(
+    addresses: List[Tuple[int, int]], threshold: int
+) -> List[str]:
     """
-    Groups individual IP addresses into subnets based on a threshold.
+    Groups individual IP addresses into subnets based on a threshold
+    and aggregates the resulting subnets.
 
     Args:
-        addresses (List[str]): List of IP addresses or subnets.
+        addresses (List[Tuple[int, int]]): List of IP addresses or subnets as network address and prefix length.
         threshold (int): Minimum number of IPs required to group into a /24 subnet.
 
     Returns:
         List[str]: List of grouped subnets.
     """
-    ip_dict = defaultdict(list)
+    # Subnets are kept as packed integers (network address << 6 | prefix length),
+    # which hash and sort like plain integers and order by address, then prefix length
     existing_subnets, individual_ips = set(), set()
 
-    for entry in addresses:
-        if "/" not in entry:
-            entry += "/32"  # Treat plain IPs as /32 subnets
-        network = ipaddress.ip_network(entry, strict=False)
-        if network.prefixlen == 32:
-            first_three_octets = str(network.network_address).rsplit(".", 1)[0]
-            ip_dict[first_three_octets].append(network)
-            individual_ips.add(network)
+    for network_address, prefixlen in addresses:
+        if prefixlen == 32:
+            individual_ips.add(network_address)
         else:
-            existing_subnets.add(network)
+            existing_subnets.add(network_address << 6 | prefixlen)
+
+    # Bucket individual IPs by their /24 block (upper 24 bits of the address)
+    block_counts = Counter(ip >> 8 for ip in individual_ips)
+    grouped_blocks = {
+        block for block, count in block_counts.items() if count >= threshold
+    }
+
+    networks = {(block << 8) << 6 | 24 for block in grouped_blocks}
+    networks.update(existing_subnets)
+    networks.update(
+        ip << 6 | 32 for ip in individual_ips if ip >> 8 not in grouped_blocks
+    )
+    # Aggregation also drops every entry covered by a larger subnet, so covered
+    # addresses never reach the WhoIs lookup
+    result = [format_ipv4(*network) for network in aggregate_subnets(networks)]
 
-    for subnet in existing_subnets:
-        first_three_octets = str(subnet.network_address).rsplit(".", 1)[0]
-        if first_three_octets in ip_dict:
-            del ip_dict[first_three_octets]
+    logging.info(f"Grouped into subnets. {len(result)} entries after grouping.")
+    return result
 
-    result = set()
-    for octets, ips in ip_dict.items():
-        if len(ips) >= threshold:
-            result.add(f"{octets}.0/24")
-            individual_ips.difference_update(ips)
 
-    result.update(str(subnet) for subnet in existing_subnets)
-    result.update(str(ip) for ip in individual_ips)
+def aggregate_subnets(subnets: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Aggregates subnets into the smallest equivalent set of subnets.
+    Subnets contained in another subnet are dropped and adjacent subnets of equal
+    size are merged into their parent subnet (e.g. two adjacent /24 into a /23).
 
-    logging.info(f"Grouped into subnets. {len(result)} entries after grouping.")
-    return list(result)
+    Args:
+        subnets (Iterable[int]): Subnets packed as network address << 6 | prefix length.
+
+    Returns:
+        List[Tuple[int, int]]: Aggregated subnets as network address and prefix length, ordered by network address.
+    """
+    aggregated = []
+    for subnet in sorted(subnets):
+        network_address, prefixlen = subnet >> 6, subnet & 0x3F
+        if aggregated:
+            last_address, last_prefixlen = aggregated[-1]
+            shift = 32 - last_prefixlen
+            if network_address >> shift == last_address >> shift:
+                continue  # Contained in the previous subnet
+        aggregated.append((network_address, prefixlen))
+
+        while len(aggregated) > 1:
+            (first_address, first_prefixlen), (second_address, second_prefixlen) = (
+                aggregated[-2:]
+            )
+            size = 1 << (32 - first_prefixlen)
+            if (
+                first_prefixlen != second_prefixlen
+                or first_prefixlen == 0
+                or first_address & size
+                or first_address + size != second_address
+            ):
+                break
+            aggregated[-2:] = [(first_address, first_prefixlen - 1)]
+
+    return aggregated
 
 
 def sort_entries_by_cidr(entries: Dict[str, str]) -> Dict[str, str]:
@@ -258,45 +455,126 @@ def sort_entries_by_cidr(entries: Dict[str, str]) -> Dict[str, str]:
         Dict[str, str]: Sorted dictionary of entries.
     """
 
-    def sort_key(entry: str) -> Tuple[int, ipaddress.IPv4Address]:
-        network = ipaddress.ip_network(entry, strict=False)
-        return (network.prefixlen, network.network_address)
+    def sort_key(entry: str) -> Tuple[int, int]:
+        network_address, prefixlen = parse_ipv4(entry)
+        return (prefixlen, network_address)
 
-    sorted_entries = dict(sorted(entries.items(), key=lambda item: sort_key(item[0])))
+    sorted_entries = {entry: entries[entry] for entry in sorted(entries, key=sort_key)}
     logging.info(f"Sorted subnets. {len(sorted_entries)} entries after sorting.")
     return sorted_entries
 
 
+def get_whois_max_workers(config: Dict[str, str]) -> int:
+    """
+    Reads the number of concurrent WhoIs lookups from the configuration.
+
+    Args:
+        config (Dict[str, str]): Configuration settings.
+
+    Returns:
+        int: Configured number of workers, or the default if missing or invalid.
+    """
+    max_workers = config.get("whois_max_workers", DEFAULT_WHOIS_MAX_WORKERS)
+    if (
+        isinstance(max_workers, bool)
+        or not isinstance(max_workers, int)
+        or max_workers < 1
+    ):
+        logging.error(
+            f"Invalid whois_max_workers {max_workers!r}, using {DEFAULT_WHOIS_MAX_WORKERS}."
+        )
+        return DEFAULT_WHOIS_MAX_WORKERS
+    return max_workers
+
+
+def create_whois_session(max_workers: int) -> requests.Session:
+    """
+    Creates a HTTP session with a connection pool sized for the WhoIs worker threads.
+
+    Args:
+        max_workers (int): Number of concurrent WhoIs lookups.
+
+    Returns:
+        requests.Session: Session with pooled connections and retries on transient errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max_workers,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    return session
+
+
 def fetch_whois_info(
-    entries: List[str], existing_entries: Dict[str, str]
+    entries: List[str],
+    existing_entries: Dict[str, str],
+    whois_cache: Dict[str, str],
+    max_workers: int,
 ) -> Dict[str, str]:
     """
     Fetches WhoIs information for a list of IP addresses or subnets.
+    Lookups are cached per /24 subnet, so only one request is sent for all new
+    entries sharing the same first three octets. Cache misses are looked up
+    concurrently using a thread pool. Entries whose lookup fails get an empty comment.
 
     Args:
         entries (List[str]): List of IP addresses or subnets.
         existing_entries (Dict[str, str]): Dictionary of already fetched WhoIs data.
+        whois_cache (Dict[str, str]): WhoIs comments keyed by the first three octets, updated in place.
+        max_workers (int): Number of concurrent WhoIs lookups.
 
     Returns:
         Dict[str, str]: Dictionary of entries with their associated WhoIs comments.
     """
     whois_info = {}
+    pending = defaultdict(list)
+    for entry in entries:
+        key = entry.split("/")[0].rsplit(".", 1)[0]
+        if entry in existing_entries:
+            whois_info[entry] = existing_entries[entry]
+        elif key in whois_cache:
+            whois_info[entry] = whois_cache[key]
+        else:
+            pending[key].append(entry)
     logging.info(
-        "Start fetching WhoIs information for new or changed entries. This could take a while..."
+        f"Start fetching WhoIs information for {len(pending)} new or changed subnets. This could take a while..."
     )
-    for entry in entries:
-        if entry not in existing_entries:
-            try:
-                response = requests.get(
-                    f"http://ipwho.is/{entry.split('/')[0]}?fields=country,region,connection.isp"
+
+    def lookup(key: str) -> Tuple[str, Optional[str]]:
+        entry = pending[key][0]
+        try:
+            response = session.get(
+                f"http://ipwho.is/{entry.split('/')[0]}?fields=success,message,country,region,connection.isp",
+                timeout=5,
+            )
+            response.raise_for_status()
+            response_json = json.loads(response.content)
+            if response_json.get("success") is False:
+                logging.error(
+                    f"WhoIs lookup for {entry} failed: {response_json.get('message')}"
                 )
-                response_json = response.json()
-                comment = f"{response_json.get('country')} | {response_json.get('region')} | {response_json.get('connection', {}).get('isp')}"
-                whois_info[entry] = comment
-            except Exception as e:
-                logging.error(f"Error processing {entry}: {e}")
-        else:
-            whois_info[entry] = existing_entries[entry]
+                return key, None
+            country = response_json.get("country")
+            region = response_json.get("region")
+            isp = (response_json.get("connection") or {}).get("isp")
+            if country is None and region is None and isp is None:
+                logging.error(f"WhoIs lookup for {entry} returned no information.")
+                return key, None
+            return key, f"{country} | {region} | {isp}"
+        except Exception as e:
+            logging.error(f"Error processing {entry}: {e}")
+            return key, None
+
+    with create_whois_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key, comment in executor.map(lookup, list(pending)):
+                if comment is not None:
+                    whois_cache[key] = comment
+                # Entries with failed lookups are kept without comment, but not cached
+                for entry in pending[key]:
+                    whois_info[entry] = comment or ""
     logging.info(f"WhoIs information processed.")
     return whois_info
 
@@ -323,16 +601,25 @@ def write_to_output_file(
         logging.error(f"The number of entries exceeds the limit of {max_entries}")
         return False
 
+    # Assemble the output from small pieces, which is cheaper than formatting a string per line
+    max_length = max_comment_length - 5
+    chunks = []
+    for entry, comment in entries.items():
+        chunks.append(entry)
+        if not comment:
+            chunks.append("\n")
+        elif len(comment) > max_comment_length - 2:
+            chunks.append(" # ")
+            chunks.append(comment[:max_length])
+            chunks.append("...\n")
+        else:
+            chunks.append(" # ")
+            chunks.append(comment)
+            chunks.append("\n")
+
     try:
-        with open(file_path, "w", encoding="utf-8") as file:
-            for entry, comment in entries.items():
-                if comment:
-                    comment = (
-                        f"# {comment[:max_comment_length-5]}...\n"
-                        if len(comment) > max_comment_length - 2
-                        else f"# {comment}\n"
-                    )
-                file.write(f"{entry} {comment}" if comment else f"{entry}\n")
+        with open(file_path, "w", encoding="utf-8", buffering=1 << 20) as file:
+            file.writelines(chunks)
         file_size = os.path.getsize(file_path)
         if file_size > max_file_size:
             logging.error(
@@ -347,40 +634,68 @@ def write_to_output_file(
 
 
 def process_lists(
-    input_file_path: str, output_file_path: str, config: Dict[str, str]
+    input_file_path: str,
+    output_file_path: str,
+    config: Dict[str, str],
+    whois_cache: Dict[str, str],
+    whois_max_workers: int,
 ) -> Tuple[bool, int, int]:
     """
     Processes input lists, validates IP addresses, groups them into subnets,
     fetches WhoIs information, and writes the final output.
+    Input files that are unchanged since their last successful run are skipped
+    unless in debug mode.
 
     Args:
         input_file_path (str): Path to the input file.
         output_file_path (str): Path to the output file.
         config (Dict[str, str]): Configuration settings for processing.
+        whois_cache (Dict[str, str]): WhoIs comments keyed by the first three octets.
+        whois_max_workers (int): Number of concurrent WhoIs lookups.
 
     Returns:
         Tuple[bool, int, int]: A tuple indicating success status, number of added entries,
                                and number of removed entries.
     """
-    raw_addresses = load_input_file_entries(input_file_path)
-    unique_addresses = remove_duplicates(raw_addresses)
-    valid_addresses = validate_ip_addresses(unique_addresses)
+    input_data = read_input_file(input_file_path)
+
+    input_hashes = load_cache_file("input_hashes.json")
+    input_hash = hash_input_file(input_data, config)
+    if (
+        not config["debug"]
+        and input_hashes.get(input_file_path) == input_hash
+        and os.path.exists(output_file_path)
+    ):
+        logging.info(f"{input_file_path} unchanged since last run. Skipping.")
+        return True, 0, 0
+
+    raw_addresses = load_input_file_entries(input_data, input_file_path)
+    valid_addresses = validate_ip_addresses(raw_addresses)
+    unique_addresses = remove_duplicates(valid_addresses)
     grouped_addresses = group_ips_into_subnets(
-        valid_addresses, config["threshold_group_ips_into_subnets"]
+        unique_addresses, config["threshold_group_ips_into_subnets"]
     )
 
     existing_entries = load_existing_output_file_entries(output_file_path)
-    looked_up_addresses = fetch_whois_info(grouped_addresses, existing_entries)
+    looked_up_addresses = fetch_whois_info(
+        grouped_addresses, existing_entries, whois_cache, whois_max_workers
+    )
 
     current_entries = set(grouped_addresses)
-    added_entries = current_entries - set(existing_entries)
-    removed_entries = set(existing_entries) - current_entries
+    existing_keys = existing_entries.keys()
+    added_entries = current_entries - existing_keys
+    removed_entries = existing_keys - current_entries
 
     for entry in removed_entries:
-        del existing_entries[entry]
+        existing_entries.pop(entry, None)
+    existing_entries.update(looked_up_addresses)
 
-    sorted_entries = sort_entries_by_cidr({**existing_entries, **looked_up_addresses})
+    sorted_entries = sort_entries_by_cidr(existing_entries)
     success = write_to_output_file(sorted_entries, output_file_path, config)
+    save_cache_file("whois_by_24.json", whois_cache)
+    if success:
+        input_hashes[input_file_path] = input_hash
+        save_cache_file("input_hashes.json", input_hashes)
 
     return success, len(added_entries), len(removed_entries)
 
@@ -400,6 +715,8 @@ def main() -> None:
         pull_latest_changes(repo)
 
         total_additions, total_deletions = 0, 0
+        whois_cache = load_cache_file("whois_by_24.json")
+        whois_max_workers = get_whois_max_workers(config)
 
         for file_name in config["input_files_to_process"]:
             input_file_path = os.path.join(config["repo_path"], file_name)
@@ -409,7 +726,11 @@ def main() -> None:
                 f"blocklist-industrial{'-manual' if 'manual' in file_name else ''}.txt",
             )
             processed, additions, deletions = process_lists(
-                input_file_path, output_file_path, config
+                input_file_path,
+                output_file_path,
+                config,
+                whois_cache,
+                whois_max_workers,
             )
             total_additions += additions
             total_deletions += deletions
@@ -434,7 +755,8 @@ def schedule_task() -> None:
     """
     Schedules the script to run at regular intervals based on the configuration.
 
-    The task runs periodically using the schedule module.
+    The task runs periodically using the schedule module. Between runs the loop
+    sleeps until the next job is due, waking up at least once a minute.
     """
     config = load_config()
     main()
@@ -445,7 +767,7 @@ def schedule_task() -> None:
 
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        time.sleep(max(1, min(schedule.idle_seconds(), 60)))
 
 
 if __name__ == "__main__":